@@ -1,8 +1,10 @@
 package main
 
 import (
-	"encoding/json"
+	"encoding/binary"
 	"fmt"
+	"io"
+	"math"
 	"net"
 	"os"
 	"os/exec"
@@ -14,16 +16,24 @@ import (
 
 const serverPort = "8888"
 
-type InferenceRequest struct {
-	Command string `json:"command"`
-	Text    string `json:"text"`
-}
+// Binary protocol frames: opcode (uint8), payload length (uint32 big-endian), payload
+const frameHeaderSize = 5
+
+const (
+	opInfer    byte = 0
+	opPing     byte = 1
+	opShutdown byte = 2
+	opError    byte = 255
+)
+
+// Infer reply payload header: rows (uint32), cols (uint32), inference time (float64), big-endian
+const embeddingsHeaderSize = 16
 
 type InferenceResponse struct {
-	Embedding     []float64 `json:"embedding"`
-	Shape         []int     `json:"shape"`
-	InferenceTime float64   `json:"inference_time"`
-	Error         string    `json:"error"`
+	Embedding     []float32
+	Shape         []int
+	InferenceTime float64
+	Error         string
 }
 
 func isServerRunning() bool {
@@ -35,6 +45,30 @@ func isServerRunning() bool {
 	return true
 }
 
+func writeFrame(w io.Writer, opcode byte, payload []byte) error {
+	frame := make([]byte, frameHeaderSize+len(payload))
+	frame[0] = opcode
+	binary.BigEndian.PutUint32(frame[1:], uint32(len(payload)))
+	copy(frame[frameHeaderSize:], payload)
+
+	_, err := w.Write(frame)
+	return err
+}
+
+func readFrame(r io.Reader) (byte, []byte, error) {
+	header := make([]byte, frameHeaderSize)
+	if _, err := io.ReadFull(r, header); err != nil {
+		return 0, nil, err
+	}
+
+	payload := make([]byte, binary.BigEndian.Uint32(header[1:]))
+	if _, err := io.ReadFull(r, payload); err != nil {
+		return 0, nil, err
+	}
+
+	return header[0], payload, nil
+}
+
 func sendInferenceRequest(text string) (*InferenceResponse, error) {
 	conn, err := net.Dial("tcp", "localhost:"+serverPort)
 	if err != nil {
@@ -42,31 +76,42 @@ func sendInferenceRequest(text string) (*InferenceResponse, error) {
 	}
 	defer conn.Close()
 
-	request := InferenceRequest{
-		Command: "infer",
-		Text:    text,
-	}
-
-	requestData, err := json.Marshal(request)
+	err = writeFrame(conn, opInfer, []byte(text))
 	if err != nil {
 		return nil, err
 	}
 
-	_, err = conn.Write(requestData)
+	opcode, payload, err := readFrame(conn)
 	if err != nil {
 		return nil, err
 	}
 
-	buffer := make([]byte, 65536) // 64KB buffer for large embeddings
-	n, err := conn.Read(buffer)
-	if err != nil {
-		return nil, err
+	if opcode == opError {
+		return &InferenceResponse{Error: string(payload)}, nil
 	}
 
-	var response InferenceResponse
-	err = json.Unmarshal(buffer[:n], &response)
-	if err != nil {
-		return nil, err
+	return decodeEmbeddings(payload)
+}
+
+func decodeEmbeddings(payload []byte) (*InferenceResponse, error) {
+	if len(payload) < embeddingsHeaderSize {
+		return nil, fmt.Errorf("short inference response: %d bytes", len(payload))
+	}
+
+	rows := int(binary.BigEndian.Uint32(payload[0:4]))
+	cols := int(binary.BigEndian.Uint32(payload[4:8]))
+	values := payload[embeddingsHeaderSize:]
+	if len(values) != rows*cols*4 {
+		return nil, fmt.Errorf("inference response has %d bytes, expected %d", len(values), rows*cols*4)
+	}
+
+	response := InferenceResponse{
+		Embedding:     make([]float32, rows*cols),
+		Shape:         []int{rows, cols},
+		InferenceTime: math.Float64frombits(binary.BigEndian.Uint64(payload[8:16])),
+	}
+	for i := range response.Embedding {
+		response.Embedding[i] = math.Float32frombits(binary.LittleEndian.Uint32(values[i*4:]))
 	}
 
 	return &response, nil
@@ -79,17 +124,7 @@ func sendShutdownRequest() error {
 	}
 	defer conn.Close()
 
-	request := InferenceRequest{
-		Command: "shutdown",
-		Text:    "",
-	}
-
-	requestData, err := json.Marshal(request)
-	if err != nil {
-		return err
-	}
-
-	_, err = conn.Write(requestData)
+	err = writeFrame(conn, opShutdown, nil)
 	if err != nil {
 		return err
 	}
@@ -0,0 +1,46 @@
+import onnx
+from onnx import helper, TensorProto
+
+MODEL_PATH = '../model/model.sim.onnx'
+POOLED_MODEL_PATH = '../model/model.pooled.onnx'
+POOLED_OUTPUT_NAME = 'sentence_embedding'
+
+def dim_value(dim):
+    """Return a tensor dimension as its fixed size or symbolic name."""
+    if dim.HasField('dim_value'):
+        return dim.dim_value
+    return dim.dim_param or None
+
+def main():
+    """Append masked mean pooling and L2 normalization to the ONNX model."""
+    print(f"Loading {MODEL_PATH}...")
+    model = onnx.load(MODEL_PATH)
+    graph = model.graph
+    
+    opset = next(opset.version for opset in model.opset_import if opset.domain in ('', 'ai.onnx'))
+    if opset < 12:
+        raise ValueError(f"Einsum needs opset 12 or newer, model uses opset {opset}")
+    
+    hidden_state = graph.output[0]
+    dims = hidden_state.type.tensor_type.shape.dim
+    
+    graph.node.extend([
+        helper.make_node('Cast', ['attention_mask'], ['pooling_mask'], to=TensorProto.FLOAT),
+        # Masked sum over the sequence. Dividing by the token count is skipped
+        # because the L2 normalization below cancels it out.
+        helper.make_node('Einsum', [hidden_state.name, 'pooling_mask'], ['pooling_sum'], equation='blh,bl->bh'),
+        helper.make_node('LpNormalization', ['pooling_sum'], [POOLED_OUTPUT_NAME], axis=1, p=2),
+    ])
+    
+    # Only expose the sentence embedding so ORT never hands back the hidden states
+    del graph.output[:]
+    graph.output.append(helper.make_tensor_value_info(
+        POOLED_OUTPUT_NAME, TensorProto.FLOAT, [dim_value(dims[0]), dim_value(dims[-1])]
+    ))
+    
+    onnx.checker.check_model(model)
+    onnx.save(model, POOLED_MODEL_PATH)
+    print(f"Saved pooled model to {POOLED_MODEL_PATH}")
+
+if __name__ == '__main__':
+    main()
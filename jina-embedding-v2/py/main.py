@@ -1,6 +1,7 @@
+import onnx
 import onnxruntime
 import numpy as np
-from transformers import AutoTokenizer, PretrainedConfig
+from transformers import BertTokenizerFast
 import time
 import sys
 import os
@@ -8,83 +9,401 @@ import socket
 import threading
 import json
 import signal
+import functools
+import queue
+import struct
+from concurrent.futures import ThreadPoolExecutor
 
 # Global variables to hold loaded model and tokenizer
 session = None
 tokenizer = None
-config = None
+# Rust backend of the tokenizer, called directly on the hot path
+fast_tokenizer = None
+
+# Pre-allocated IO binding buffers, reused across requests. Only the batching
+# worker (and warmup in load_model, before it starts) touches them.
+io_binding = None
+input_buffers = {}
+output_name = None
+output_buffer = None
+# True when the graph itself pools and normalizes (see fuse_pooling.py)
+pooled_output = False
+zero_token_type_ids = None
+
+# Requests waiting for the batching worker: (texts, done event, result dict)
+request_queue = queue.Queue()
+# False for dynamically quantized models, see load_model
+coalesce_requests = True
 
 SERVER_PORT = 8888
-MODEL_PATH = '../model/model.onnx'
+# JSON protocol kept on a separate port for debugging
+JSON_SERVER_PORT = 8889
+TOKENIZE_CACHE_SIZE = 4096
+# Only short texts are cached: a text yields at most about one token per char,
+# so this bounds the cache to roughly 4096 * 3 * 258 * 8 bytes (~25 MB)
+TOKENIZE_CACHE_MAX_CHARS = 256
+MODEL_PATH = '../model/model.int8.onnx'
+# Set ORT_PROFILE=1 to write per-operator timings (chrome://tracing JSON) on shutdown
+PROFILE = os.environ.get('ORT_PROFILE') == '1'
+PROFILE_PREFIX = 'jina_v2'
+# ORT-optimized copies of MODEL_PATH, one per provider set (see optimized_model_path)
+OPTIMIZED_MODEL_PREFIX = '../model/model.int8'
+# oneDNN dispatches the INT8 MatMuls to VNNI/AMX kernels when this ORT build has it
+PROVIDERS = [
+    provider for provider in ['DnnlExecutionProvider', 'CPUExecutionProvider']
+    if provider in onnxruntime.get_available_providers()
+]
+# Ops that quantize activations with a scale computed from the whole batch tensor
+DYNAMIC_QUANTIZE_OPS = {'DynamicQuantizeLinear', 'DynamicQuantizeMatMul'}
+# Providers that compile nodes; ORT cannot serialize a graph containing them
+COMPILING_PROVIDERS = {'DnnlExecutionProvider'}
+MAX_SEQ_LEN = 8192
+# Integer input types the exported model may declare
+INPUT_DTYPES = {'tensor(int64)': np.int64, 'tensor(int32)': np.int32}
+MAX_BATCH_SIZE = 32
+# Socket I/O threads; they only read requests and wait on the batching worker
+N_IO_THREADS = MAX_BATCH_SIZE
+# Socket timeout for client connections, so idle clients can't keep pool
+# threads (which the interpreter joins at exit) alive after shutdown
+CLIENT_TIMEOUT = 2.0
+
+# Binary protocol frames: opcode, payload length, then the payload. Infer takes
+# UTF-8 text, infer batch takes '!I'-length-prefixed UTF-8 texts. Replies echo
+# the opcode, or OP_ERROR with a UTF-8 message.
+FRAME_HEADER = '!BI'
+OP_INFER = 0
+OP_PING = 1
+OP_SHUTDOWN = 2
+OP_INFER_BATCH = 3
+OP_ERROR = 255
+
+# Infer reply payload: rows, columns, inference time, then float32 LE values
+EMBEDDINGS_HEADER = '!IId'
+
+# JSON requests are a '!I' length prefix followed by that many bytes of JSON
+JSON_REQUEST_HEADER = '!I'
 
 # Global server state
 server_socket = None
+json_server_socket = None
 shutdown_requested = False
 
+def create_session_options():
+    """Build ONNX Runtime session options tuned for CPU inference."""
+    opts = onnxruntime.SessionOptions()
+    opts.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    opts.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    # Roughly one thread per physical core, avoid oversubscribing hyperthreads
+    opts.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+    opts.inter_op_num_threads = 1
+    opts.add_session_config_entry("session.set_denormal_as_zero", "1")
+    # Keep the memory arena and pattern planning so warmup allocations are reused
+    opts.enable_cpu_mem_arena = True
+    opts.enable_mem_pattern = True
+    if PROFILE:
+        opts.enable_profiling = True
+        opts.profile_file_prefix = PROFILE_PREFIX
+    return opts
+
+def optimized_model_path():
+    """Return the optimized graph cache path for PROVIDERS, or None if it can't be cached."""
+    if COMPILING_PROVIDERS.intersection(PROVIDERS):
+        return None
+    # The optimized graph is provider specific, so the provider set is part of the key
+    providers = '-'.join(provider.removesuffix('ExecutionProvider').lower() for provider in PROVIDERS)
+    return f"{OPTIMIZED_MODEL_PREFIX}.{providers}.opt.onnx"
+
+def is_dynamically_quantized(model_path):
+    """Return whether the model quantizes activations at run time."""
+    model = onnx.load(model_path, load_external_data=False)
+    return any(node.op_type in DYNAMIC_QUANTIZE_OPS for node in model.graph.node)
+
+def save_optimized_model(cache_path):
+    """Optimize MODEL_PATH with the portable graph passes and save it to cache_path."""
+    print(f"Saving optimized graph to {cache_path}...")
+    opts = create_session_options()
+    # ORT_ENABLE_ALL layout passes depend on the CPU and ORT build, keep them out of the file
+    opts.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    opts.enable_profiling = False
+    opts.optimized_model_filepath = cache_path
+    onnxruntime.InferenceSession(MODEL_PATH, sess_options=opts, providers=PROVIDERS)
+
 def mean_pooling(model_output: np.ndarray, attention_mask: np.ndarray):
     """Apply mean pooling to model outputs."""
-    token_embeddings = model_output
-    input_mask_expanded = np.expand_dims(attention_mask, axis=-1)
-    input_mask_expanded = np.broadcast_to(input_mask_expanded, token_embeddings.shape)
-    sum_embeddings = np.sum(token_embeddings * input_mask_expanded, axis=1)
-    sum_mask = np.clip(np.sum(input_mask_expanded, axis=1), a_min=1e-9, a_max=None)
+    # Keep the reduction in float32, matching the model output
+    model_output = model_output.astype(np.float32, copy=False)
+    # No padding: pooling reduces to a plain mean over the sequence
+    if attention_mask.ndim == 2 and attention_mask.all():
+        return model_output.mean(axis=1)
+    mask = attention_mask.astype(np.float32, copy=False)
+    # Single contraction over the sequence axis instead of broadcast + multiply + sum
+    sum_embeddings = np.einsum('blh,bl->bh', model_output, mask)
+    sum_mask = np.maximum(mask.sum(axis=1, keepdims=True), 1e-9)
     return sum_embeddings / sum_mask
 
-def handle_inference_request(text):
-    """Handle inference request and return embeddings."""
-    global session, tokenizer, config
-    
-    if session is None or tokenizer is None:
-        return {"error": "Model not loaded"}
-    
-    try:
-        # Start timing from tokenization
-        start_time = time.time()
-        
-        # Tokenize input
-        input_text = tokenizer(text, return_tensors='np')
-        
-        # Prepare inputs for ONNX model
+def run_model(inputs):
+    """Run the model through IO binding on the worker-owned buffers."""
+    # The returned output is a view into the shared buffer, valid until the next run
+    seq_len = inputs['input_ids'].shape[1]
+    for name, buffer in input_buffers.items():
+        view = buffer[:, :seq_len]
+        view[...] = inputs[name]
+        io_binding.bind_input(name, 'cpu', 0, view.dtype, view.shape, view.ctypes.data)
+    output = output_buffer if pooled_output else output_buffer[:, :seq_len]
+    io_binding.bind_output(output_name, 'cpu', 0, np.float32, output.shape, output.ctypes.data)
+    session.run_with_iobinding(io_binding)
+    return output
+
+def get_token_type_ids(input_text):
+    """Return the tokenizer's token_type_ids, or a view of the shared zero buffer."""
+    if 'token_type_ids' in input_text:
+        return input_text['token_type_ids']
+    batch_size, seq_len = input_text['input_ids'].shape
+    if batch_size > zero_token_type_ids.shape[0]:
+        return np.zeros_like(input_text['input_ids'])
+    return zero_token_type_ids[:batch_size, :seq_len]
+
+def encodings_to_inputs(encodings):
+    """Stack fast tokenizer encodings into model input arrays."""
+    input_text = {
+        'input_ids': np.asarray([encoding.ids for encoding in encodings], dtype=np.int64),
+        'attention_mask': np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+    }
+    if 'token_type_ids' in tokenizer.model_input_names:
+        input_text['token_type_ids'] = np.asarray([encoding.type_ids for encoding in encodings], dtype=np.int64)
+    input_text['token_type_ids'] = get_token_type_ids(input_text)
+    return input_text
+
+def tokenize(text):
+    """Tokenize text into model inputs, from the cache for short texts."""
+    if len(text) <= TOKENIZE_CACHE_MAX_CHARS:
+        return tokenize_cached(text)
+    return tokenize_uncached(text)
+
+def tokenize_uncached(text):
+    """Tokenize text into model inputs."""
+    input_text = encodings_to_inputs([fast_tokenizer.encode(text)])
+    return input_text['input_ids'], input_text['attention_mask'], input_text['token_type_ids']
+
+@functools.lru_cache(maxsize=TOKENIZE_CACHE_SIZE)
+def tokenize_cached(text):
+    """Tokenize text into read-only model inputs, cached for repeated requests."""
+    arrays = tokenize_uncached(text)
+    # Cached arrays are shared between requests, so guard them against mutation
+    for array in arrays:
+        array.setflags(write=False)
+    return arrays
+
+def embed_texts(texts):
+    """Tokenize and embed a list of texts, returning normalized embeddings."""
+    if len(texts) == 1:
+        # Single text: cached tokenization and the IO binding buffers
+        input_ids, attention_mask, token_type_ids = tokenize(texts[0])
+        inputs = {
+            'input_ids': input_ids,
+            'attention_mask': attention_mask,
+            'token_type_ids': token_type_ids
+        }
+        outputs = run_model(inputs)
+        if pooled_output:
+            # Already normalized; copy it out of the shared output buffer
+            return outputs.copy()
+        embeddings = mean_pooling(outputs, attention_mask)
+    else:
+        # Tokenize the whole batch at once, padding to the longest text
+        input_text = encodings_to_inputs(fast_tokenizer.encode_batch(texts))
         inputs = {
             'input_ids': input_text['input_ids'],
             'attention_mask': input_text['attention_mask'],
-            'token_type_ids': input_text.get('token_type_ids', np.zeros_like(input_text['input_ids']))
+            'token_type_ids': input_text['token_type_ids']
         }
+        # Match the model's input dtypes so ORT doesn't convert them
+        inputs = {name: inputs[name].astype(buffer.dtype, copy=False) for name, buffer in input_buffers.items()}
         
-        # Run model
-        outputs = session.run(None, inputs)[0]
-        
-        # Record total time including tokenization and inference
-        total_time = time.time() - start_time
-        
-        # Apply mean pooling and normalization to the model outputs
+        # The IO binding buffers only cover a single sequence
+        outputs = session.run([output_name], inputs)[0]
+        if pooled_output:
+            return outputs
         embeddings = mean_pooling(outputs, input_text["attention_mask"])
-        embeddings = embeddings / np.linalg.norm(embeddings, ord=2, axis=1, keepdims=True)
+    
+    # L2 normalize in place; pooling always returns a fresh array
+    inv_norm = 1.0 / np.sqrt(np.einsum('ij,ij->i', embeddings, embeddings))[:, None]
+    np.multiply(embeddings, inv_norm, out=embeddings)
+    return embeddings
+
+def run_batch(pending):
+    """Embed the texts of the pending requests together and hand back their rows."""
+    # Start timing from tokenization
+    start_time = time.time()
+    embeddings = embed_texts([text for texts, _, _ in pending for text in texts])
+    total_time = time.time() - start_time
+    
+    # Scatter the rows back to the waiting requests
+    offset = 0
+    for texts, _, result in pending:
+        result["embeddings"] = embeddings[offset:offset + len(texts)]
+        result["inference_time"] = total_time
+        offset += len(texts)
+
+def batch_worker():
+    """Drain queued requests into batches and run them through the model together."""
+    while True:
+        pending = [request_queue.get()]
+        batch_size = len(pending[0][0])
         
-        return {
-            "embedding": embeddings[0].tolist(),
-            "shape": list(embeddings.shape),
-            "inference_time": total_time
-        }
+        # Batch whatever queued up during the previous run, but never wait for
+        # more: a lone request goes straight to the model
+        while coalesce_requests and batch_size < MAX_BATCH_SIZE:
+            try:
+                item = request_queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.append(item)
+            batch_size += len(item[0])
         
-    except Exception as e:
-        return {"error": str(e)}
+        try:
+            run_batch(pending)
+        except Exception as e:
+            if len(pending) == 1:
+                pending[0][2]["error"] = str(e)
+            else:
+                # Don't fail the requests coalesced with a bad one: re-run each
+                # alone so the error only reaches the request that caused it
+                for item in pending:
+                    try:
+                        run_batch([item])
+                    except Exception as e:
+                        item[2]["error"] = str(e)
+        finally:
+            for _, done, _ in pending:
+                done.set()
+
+def submit_texts(texts):
+    """Hand texts to the batching worker and wait for their embeddings."""
+    done = threading.Event()
+    result = {}
+    request_queue.put((texts, done, result))
+    done.wait()
+    return result
+
+def handle_inference_request(text):
+    """Handle inference request and return embeddings."""
+    global session, tokenizer
+    
+    if session is None or tokenizer is None:
+        return {"error": "Model not loaded"}
+    
+    return submit_texts([text])
+
+def handle_inference_request_batch(texts):
+    """Handle a batch inference request, embedding all texts in one worker batch."""
+    if session is None or tokenizer is None:
+        return {"error": "Model not loaded"}
+    
+    if not texts:
+        return {"error": "No texts provided"}
+    
+    return submit_texts(texts)
+
+def recv_exact(sock, n):
+    """Read exactly n bytes from the socket."""
+    buffer = bytearray(n)
+    view = memoryview(buffer)
+    received = 0
+    while received < n:
+        count = sock.recv_into(view[received:], n - received)
+        if count == 0:
+            raise ConnectionError("Connection closed before full message was received")
+        received += count
+    return buffer
+
+def send_frame(sock, opcode, payload=b''):
+    """Send a binary protocol frame."""
+    sock.sendall(struct.pack(FRAME_HEADER, opcode, len(payload)) + payload)
+
+def encode_embeddings(result):
+    """Encode an inference result as the binary infer reply payload."""
+    embeddings = result["embeddings"]
+    rows, cols = embeddings.shape
+    header = struct.pack(EMBEDDINGS_HEADER, rows, cols, result["inference_time"])
+    return header + embeddings.astype('<f4', copy=False).tobytes()
+
+def decode_texts(payload):
+    """Decode an infer batch payload of length-prefixed UTF-8 texts."""
+    texts = []
+    offset = 0
+    while offset < len(payload):
+        if offset + 4 > len(payload):
+            raise ValueError('truncated text length in infer batch payload')
+        length = struct.unpack_from('!I', payload, offset)[0]
+        offset += 4
+        if offset + length > len(payload):
+            raise ValueError(f'text length {length} overruns infer batch payload')
+        texts.append(payload[offset:offset + length].decode('utf-8'))
+        offset += length
+    return texts
 
 def handle_client(client_socket):
-    """Handle client connection."""
+    """Handle binary protocol client connection."""
+    global shutdown_requested
+    try:
+        header = recv_exact(client_socket, struct.calcsize(FRAME_HEADER))
+        opcode, length = struct.unpack(FRAME_HEADER, header)
+        payload = recv_exact(client_socket, length)
+        
+        if opcode == OP_INFER or opcode == OP_INFER_BATCH:
+            if opcode == OP_INFER:
+                result = handle_inference_request(payload.decode('utf-8'))
+            else:
+                result = handle_inference_request_batch(decode_texts(payload))
+            if "error" in result:
+                send_frame(client_socket, OP_ERROR, result["error"].encode('utf-8'))
+            else:
+                send_frame(client_socket, opcode, encode_embeddings(result))
+        elif opcode == OP_PING:
+            send_frame(client_socket, OP_PING)
+        elif opcode == OP_SHUTDOWN:
+            shutdown_requested = True
+            send_frame(client_socket, OP_SHUTDOWN)
+        else:
+            send_frame(client_socket, OP_ERROR, b'Unknown command')
+            
+    except Exception as e:
+        send_frame(client_socket, OP_ERROR, str(e).encode('utf-8'))
+    finally:
+        client_socket.close()
+
+def handle_json_client(client_socket):
+    """Handle JSON protocol client connection, for debugging."""
+    global shutdown_requested
     try:
-        data = client_socket.recv(4096).decode('utf-8')
-        request = json.loads(data)
+        header = recv_exact(client_socket, struct.calcsize(JSON_REQUEST_HEADER))
+        length = struct.unpack(JSON_REQUEST_HEADER, header)[0]
+        request = json.loads(recv_exact(client_socket, length))
         
         if request["command"] == "infer":
-            result = handle_inference_request(request["text"])
+            if "texts" in request:
+                texts = request["texts"]
+                if not isinstance(texts, list) or not texts or not all(isinstance(text, str) for text in texts):
+                    result = {"error": "texts must be a non-empty list of strings"}
+                else:
+                    result = handle_inference_request_batch(texts)
+            elif not isinstance(request["text"], str):
+                result = {"error": "text must be a string"}
+            else:
+                result = handle_inference_request(request["text"])
+            if "embeddings" in result:
+                embeddings = result.pop("embeddings")
+                result["shape"] = list(embeddings.shape)
+                if "texts" in request:
+                    result["embeddings"] = embeddings.tolist()
+                else:
+                    result["embedding"] = embeddings[0].tolist()
             response = json.dumps(result)
-            response_bytes = response.encode('utf-8')
-            client_socket.sendall(response_bytes)
+            client_socket.sendall(response.encode('utf-8'))
         elif request["command"] == "ping":
             client_socket.send(b'{"status": "pong"}')
         elif request["command"] == "shutdown":
-            global shutdown_requested
             shutdown_requested = True
             client_socket.send(b'{"status": "shutting down"}')
         else:
@@ -103,68 +422,154 @@ def signal_handler(signum, frame):
     shutdown_requested = True
     if server_socket:
         server_socket.close()
+    if json_server_socket:
+        json_server_socket.close()
+
+def create_server_socket(port):
+    """Create a listening socket on localhost."""
+    listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Let several server processes share the port, the kernel balances between them
+    if hasattr(socket, 'SO_REUSEPORT'):
+        listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    listen_socket.bind(('localhost', port))
+    listen_socket.listen(5)
+    return listen_socket
+
+def accept_connections(listen_socket, handler, executor):
+    """Accept connections and hand them to the I/O pool until shutdown."""
+    while not shutdown_requested:
+        try:
+            listen_socket.settimeout(1.0)  # 1 second timeout for accept
+            client_socket, addr = listen_socket.accept()
+            listen_socket.settimeout(None)  # Reset timeout
+            client_socket.settimeout(CLIENT_TIMEOUT)
+            # Small request/response frames; don't let Nagle delay them
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            
+            if shutdown_requested:
+                client_socket.close()
+                break
+                
+            executor.submit(handler, client_socket)
+            
+        except socket.timeout:
+            continue  # Check shutdown_requested flag
+        except OSError as e:
+            if shutdown_requested:
+                break
+            print(f"Socket error: {e}")
+            break
 
 def start_server():
     """Start the inference server."""
-    global server_socket, shutdown_requested
+    global server_socket, json_server_socket, shutdown_requested
     
     # Register signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server_socket.bind(('localhost', SERVER_PORT))
-    server_socket.listen(5)
+    server_socket = create_server_socket(SERVER_PORT)
+    json_server_socket = create_server_socket(JSON_SERVER_PORT)
+    
+    # Single worker that owns inference and batches concurrent requests
+    worker_thread = threading.Thread(target=batch_worker)
+    worker_thread.daemon = True
+    worker_thread.start()
     
-    print(f"Server started on port {SERVER_PORT}")
+    # Bounded pool of socket I/O threads; inference stays on the worker above
+    executor = ThreadPoolExecutor(max_workers=N_IO_THREADS)
+    
+    # JSON debug port is served from its own accept thread
+    json_thread = threading.Thread(target=accept_connections, args=(json_server_socket, handle_json_client, executor))
+    json_thread.daemon = True
+    json_thread.start()
+    
+    print(f"Server started on port {SERVER_PORT} (JSON debug port {JSON_SERVER_PORT})")
     
     try:
-        while not shutdown_requested:
-            try:
-                server_socket.settimeout(1.0)  # 1 second timeout for accept
-                client_socket, addr = server_socket.accept()
-                server_socket.settimeout(None)  # Reset timeout
-                
-                if shutdown_requested:
-                    client_socket.close()
-                    break
-                    
-                client_thread = threading.Thread(target=handle_client, args=(client_socket,))
-                client_thread.daemon = True
-                client_thread.start()
-                
-            except socket.timeout:
-                continue  # Check shutdown_requested flag
-            except OSError as e:
-                if shutdown_requested:
-                    break
-                print(f"Socket error: {e}")
-                break
-                
+        accept_connections(server_socket, handle_client, executor)
     except Exception as e:
         print(f"Server error: {e}")
     finally:
         print("Server shutting down...")
+        shutdown_requested = True
         if server_socket:
             server_socket.close()
+        if json_server_socket:
+            json_server_socket.close()
+        # Stop the JSON accept thread before the pool, so it can't submit to a shut down executor
+        json_thread.join()
+        executor.shutdown(wait=False, cancel_futures=True)
+        if PROFILE and session is not None:
+            print(f"Profile written to {session.end_profiling()}")
 
 def load_model():
     """Load the model and tokenizer."""
-    global session, tokenizer, config
+    global session, tokenizer, fast_tokenizer, io_binding, input_buffers, output_name, output_buffer, pooled_output, zero_token_type_ids, coalesce_requests
+    
+    # One session per process; a second one would fight over ORT's thread pool
+    if session is not None:
+        return
     
     try:
-        # Load tokenizer and model config
-        print("Loading tokenizer and config...")
-        tokenizer = AutoTokenizer.from_pretrained('jinaai/jina-embeddings-v2-base-en')
-        config = PretrainedConfig.from_pretrained('jinaai/jina-embeddings-v2-base-en')
+        # Load tokenizer
+        print("Loading tokenizer...")
+        tokenizer = BertTokenizerFast.from_pretrained('jinaai/jina-embeddings-v2-base-en')
+        
+        # Configure the Rust backend once; requests call it without the Python wrapper
+        fast_tokenizer = tokenizer.backend_tokenizer
+        fast_tokenizer.enable_truncation(max_length=MAX_SEQ_LEN)
+        fast_tokenizer.enable_padding(pad_id=tokenizer.pad_token_id, pad_token=tokenizer.pad_token)
         
         # Load ONNX session
-        print(f"Loading ONNX model from {MODEL_PATH}...")
-        session = onnxruntime.InferenceSession(MODEL_PATH)
+        opts = create_session_options()
+        model_path = MODEL_PATH
+        cache_path = optimized_model_path()
+        if cache_path is None:
+            print("Compiling execution provider in use, not caching the optimized graph")
+        else:
+            if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(MODEL_PATH):
+                save_optimized_model(cache_path)
+            # The cache skips the portable passes; the hardware specific
+            # ORT_ENABLE_ALL passes still run for this machine on load
+            model_path = cache_path
+        
+        print(f"Loading ONNX model from {model_path}...")
+        session = onnxruntime.InferenceSession(model_path, sess_options=opts, providers=PROVIDERS)
+        
+        # Dynamic quantization picks one activation scale per batch, padded rows
+        # included, so batching independent requests would make a text's
+        # embedding depend on whatever it happened to share a batch with
+        coalesce_requests = not is_dynamically_quantized(MODEL_PATH)
+        if not coalesce_requests:
+            print("Dynamically quantized model, not batching independent requests")
         
         # Check model inputs
         print("Model inputs: " + str([input.name for input in session.get_inputs()]))
+        print("Execution providers: " + str(session.get_providers()))
+        
+        # Allocate IO binding buffers sized for the longest supported sequence,
+        # in the model's own input dtype (int32 inputs halve the bytes moved)
+        io_binding = session.io_binding()
+        input_buffers = {
+            input.name: np.zeros((1, MAX_SEQ_LEN), dtype=INPUT_DTYPES.get(input.type, np.int64))
+            for input in session.get_inputs()
+        }
+        output = session.get_outputs()[0]
+        output_name = output.name
+        pooled_output = len(output.shape) == 2
+        if pooled_output:
+            output_buffer = np.zeros((1, output.shape[-1]), dtype=np.float32)
+        else:
+            output_buffer = np.zeros((1, MAX_SEQ_LEN, output.shape[-1]), dtype=np.float32)
+        zero_token_type_ids = np.zeros((MAX_BATCH_SIZE, MAX_SEQ_LEN), dtype=np.int64)
+        zero_token_type_ids.setflags(write=False)
+        
+        # Warm up kernels and scratch buffers so the first request isn't slow
+        print("Warming up model...")
+        embed_texts(["warmup"])
+        embed_texts(["x " * 256])
         print("Model loaded successfully!")
         
     except Exception as e:
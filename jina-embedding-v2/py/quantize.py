@@ -0,0 +1,21 @@
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+MODEL_PATH = '../model/model.pooled.onnx'
+QUANTIZED_MODEL_PATH = '../model/model.int8.onnx'
+
+def main():
+    """Quantize the MatMul/Gemm weights of the ONNX model to INT8."""
+    print(f"Quantizing {MODEL_PATH} to {QUANTIZED_MODEL_PATH}...")
+    quantize_dynamic(
+        MODEL_PATH,
+        QUANTIZED_MODEL_PATH,
+        weight_type=QuantType.QInt8,
+        op_types_to_quantize=['MatMul', 'Gemm'],
+        # Per output channel scales keep accuracy close to the FP32 model
+        per_channel=True,
+        reduce_range=False,
+    )
+    print("Quantization complete!")
+
+if __name__ == '__main__':
+    main()